@@ -0,0 +1,190 @@
+"""tests/conftest.py
+
+Hooks and fixtures for the Spark development container test suite. The container
+fixtures are session-scoped so each container is started once and reused by every
+test module that requests it. Configuration and utilities live in helpers.py.
+"""
+
+import os
+import re
+import pytest
+from helpers import (
+    DOCKER_IMAGE,
+    IMAGE_ID_CACHE_KEY,
+    REQUIRED_ENV_VARS,
+    SPARK_JOB_MOUNT,
+    SPARK_JOB_NAME,
+    SPARK_JOB_SCRIPT,
+    SSH_HOST,
+    SSH_PORT,
+    VERSION_COMMANDS,
+    VERSIONS_DELIMITER,
+    VERSIONS_TIMEOUT,
+    get_image_id,
+    run_command,
+    wait_for_running,
+    wait_for_ssh,
+)
+
+# This session's results for skip_if_image_unchanged tests (None once one fails).
+IMAGE_ID_RESULTS = {}
+
+# ---------------------------------------------------------------------------
+# Hooks
+# ---------------------------------------------------------------------------
+def pytest_addoption(parser):
+    """Register the --force command-line option."""
+    parser.addoption(
+        "--force",
+        action="store_true",
+        default=False,
+        help="Run tests marked skip_if_image_unchanged even if the image has not changed.",
+    )
+
+def pytest_configure(config):
+    """Exit before collection if any of REQUIRED_ENV_VARS is unset."""
+    if config.option.help:
+        return
+    missing = [name for name in REQUIRED_ENV_VARS if not os.environ.get(name)]
+    if missing:
+        pytest.exit("Missing env: " + ", ".join(missing))
+
+def pytest_sessionstart(session):
+    """Exit before any test runs if DOCKER_IMAGE does not exist locally.
+
+    Every `docker run` uses --pull=never, so without a local image each test would
+    fail on its own. Under pytest-xdist only the controller checks, so the message
+    is not lost behind a crashed worker.
+    """
+    config = session.config
+    if config.option.help or config.option.collectonly or hasattr(config, "workerinput"):
+        return
+    try:
+        get_image_id()
+    except RuntimeError:
+        pytest.exit(f"Docker image {DOCKER_IMAGE} not found locally. Build it before running the tests.")
+
+def pytest_collection_modifyitems(config, items):
+    """Skip skip_if_image_unchanged tests that last passed against the current image.
+
+    Skipping at collection time means the fixtures those tests use are never set up.
+    Nothing is skipped when the cache provider is disabled.
+    """
+    cache = getattr(config, "cache", None)
+    if cache is None or config.getoption("--force"):
+        return
+    passed_on = cache.get(IMAGE_ID_CACHE_KEY, {})
+    candidates = [
+        item for item in items
+        if item.get_closest_marker("skip_if_image_unchanged") and item.nodeid in passed_on
+    ]
+    if not candidates:
+        return
+    try:
+        image_id = get_image_id()
+    except RuntimeError:
+        return
+    skip = pytest.mark.skip(
+        reason=f"Image {DOCKER_IMAGE} unchanged since this test last passed (use --force to rerun)."
+    )
+    for item in candidates:
+        if passed_on[item.nodeid] == image_id:
+            item.add_marker(skip)
+
+def pytest_runtest_logreport(report):
+    """Track which skip_if_image_unchanged tests passed, and against which image."""
+    if "skip_if_image_unchanged" not in report.keywords:
+        return
+    if report.failed:
+        IMAGE_ID_RESULTS[report.nodeid] = None
+    elif report.when == "call" and report.passed:
+        IMAGE_ID_RESULTS.setdefault(report.nodeid, dict(report.user_properties).get("image_id"))
+
+def pytest_sessionfinish(session):
+    """Save the image ID each skip_if_image_unchanged test passed against this session.
+
+    Tests that did not run keep their previous entry and tests that failed lose it.
+    Under pytest-xdist only the controller saves, once every worker has finished.
+    """
+    cache = getattr(session.config, "cache", None)
+    if cache is None or hasattr(session.config, "workerinput") or not IMAGE_ID_RESULTS:
+        return
+    passed_on = cache.get(IMAGE_ID_CACHE_KEY, {})
+    for nodeid, image_id in IMAGE_ID_RESULTS.items():
+        if image_id is None:
+            passed_on.pop(nodeid, None)
+        else:
+            passed_on[nodeid] = image_id
+    cache.set(IMAGE_ID_CACHE_KEY, passed_on)
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+@pytest.fixture(scope="session")
+def docker_image():
+    """Fixture to look up the local image ID of DOCKER_IMAGE once per session.
+
+    Returns
+    -------
+    str
+        The local image ID of DOCKER_IMAGE.
+    """
+    return get_image_id()
+
+@pytest.fixture(autouse=True)
+def record_image_id(request, docker_image):
+    """Fixture to tag skip_if_image_unchanged test reports with the image ID they ran against."""
+    if request.node.get_closest_marker("skip_if_image_unchanged"):
+        request.node.user_properties.append(("image_id", docker_image))
+
+@pytest.fixture(scope="session")
+def spark_job_dir(tmp_path_factory):
+    """Fixture to write SPARK_JOB_SCRIPT to a host directory for ssh_container to mount."""
+    job_dir = tmp_path_factory.mktemp("spark_job")
+    (job_dir / SPARK_JOB_NAME).write_text(SPARK_JOB_SCRIPT)
+    return job_dir
+
+@pytest.fixture(scope="session")
+def ssh_container(spark_job_dir):
+    """Fixture to run the container in detached mode with SSH mapping.
+
+    Maps container port 22 to host port SSH_PORT. Besides SSH tests, this is the
+    container tests `docker exec` into instead of starting one of their own. The
+    Spark job directory is bind-mounted read-only, and /tmp is mounted as tmpfs so
+    scratch files Spark writes there skip the overlay layer.
+    """
+    container_id = run_command([
+        "docker", "run", "-d", "--pull=never", "--tmpfs", "/tmp:rw,size=64m",
+        "-v", f"{spark_job_dir}:{SPARK_JOB_MOUNT}:ro",
+        "-p", f"{SSH_PORT}:22", DOCKER_IMAGE,
+    ])
+    wait_for_ssh(SSH_HOST, SSH_PORT)
+    yield container_id
+    run_command(["docker", "rm", "-f", container_id])
+
+@pytest.fixture(scope="session")
+def detached_container():
+    """Fixture to run the container in detached mode (for logs and other tests).
+
+    No port is published, so this container can run alongside ssh_container for the
+    whole session. Readiness is taken from the container state rather than from a
+    connection, which sshd would log as an aborted key exchange.
+    """
+    container_id = run_command(["docker", "run", "-d", "--pull=never", DOCKER_IMAGE])
+    wait_for_running(container_id)
+    yield container_id
+    run_command(["docker", "rm", "-f", container_id])
+
+@pytest.fixture(scope="session")
+def versions_blob(ssh_container):
+    """Fixture to run every VERSION_COMMANDS check in one `docker exec`.
+
+    Returns
+    -------
+    dict
+        Output of each command, keyed on the tool name used in VERSION_COMMANDS.
+    """
+    script = f"; echo {VERSIONS_DELIMITER}; ".join(VERSION_COMMANDS.values())
+    output = run_command(["docker", "exec", ssh_container, "bash", "-c", script], timeout=VERSIONS_TIMEOUT)
+    sections = re.split(rf"^{VERSIONS_DELIMITER}$", output, flags=re.M)
+    return {name: section.strip() for name, section in zip(VERSION_COMMANDS, sections)}
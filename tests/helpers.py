@@ -0,0 +1,166 @@
+"""tests/helpers.py
+
+Configuration and utilities shared by conftest.py and the test modules. Environment
+variables are loaded from .env once here. Kept out of conftest.py so test modules
+can import it under any pytest import mode.
+"""
+
+import os
+import shlex
+import socket
+import subprocess
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+# Checked by pytest_configure so a missing variable stops the run with one message.
+REQUIRED_ENV_VARS = [
+    "TEST__DOCKER_IMAGE",
+    "TEST__SSH_HOST",
+    "TEST__SSH_PORT",
+    "TEST__SSH_USER",
+]
+
+DOCKER_IMAGE = os.getenv("TEST__DOCKER_IMAGE")
+SSH_HOST = os.getenv("TEST__SSH_HOST")
+SSH_USER = os.getenv("TEST__SSH_USER")
+SSH_PASSWORD = os.getenv("TEST__SSH_PASSWORD")
+
+# Under pytest-xdist every worker starts its own session containers, so each
+# worker publishes SSH on its own host port (gw0 -> SSH_PORT, gw1 -> SSH_PORT + 1, ...).
+XDIST_WORKER = os.getenv("PYTEST_XDIST_WORKER", "gw0")
+_ssh_port = os.getenv("TEST__SSH_PORT")
+SSH_PORT = int(_ssh_port) + int(XDIST_WORKER.removeprefix("gw")) if _ssh_port else None
+
+# Tool checks batched into a single `docker exec` by the versions_blob fixture.
+# Tools that report their version on stderr have it folded into stdout.
+VERSION_COMMANDS = {
+    "spark-shell": "spark-shell --version 2>&1",
+    "pyspark": "pyspark --version 2>&1",
+    "spark-submit": "spark-submit --version 2>&1",
+    "java": "java -version 2>&1",
+    "scala": "scala -e 'println(42)'",
+    "uv": "python3 -c 'import uv; print(uv.__version__)'",
+    "git": "git --version",
+    "curl": "curl --version",
+}
+VERSIONS_DELIMITER = "---"
+# pytest-timeout (120 s) also covers fixture setup, so the first test using
+# versions_blob must fit ssh_container's start and sshd wait (up to 30 s) plus this.
+VERSIONS_TIMEOUT = 45
+
+# Minimal PySpark job run by test_spark_submit_job. Its host directory is mounted
+# read-only into ssh_container at SPARK_JOB_MOUNT.
+SPARK_JOB_SCRIPT = "print('Hello, Spark!')\n"
+SPARK_JOB_NAME = "test_job.py"
+SPARK_JOB_MOUNT = "/job"
+SPARK_JOB_PATH = f"{SPARK_JOB_MOUNT}/{SPARK_JOB_NAME}"
+
+# pytest cache key mapping each skip_if_image_unchanged test to the image ID it last
+# passed against.
+IMAGE_ID_CACHE_KEY = "spark/image_ids"
+
+# ---------------------------------------------------------------------------
+# Utility Functions
+# ---------------------------------------------------------------------------
+def run_command(cmd, timeout=30):
+    """Run a command and return its stdout as a string.
+
+    The command is executed directly rather than through a shell; wrap it in
+    `bash -c` where pipes or redirection are needed.
+
+    Parameters
+    ----------
+    cmd : list of str
+        The command and its arguments.
+    timeout : int, optional
+        Timeout in seconds (default is 30).
+
+    Returns
+    -------
+    str
+        Standard output from the command.
+
+    Raises
+    ------
+    RuntimeError
+        If the command cannot be started or exits with a non-zero status.
+    """
+    try:
+        result = subprocess.run(
+            cmd, capture_output=True, text=True, timeout=timeout
+        )
+    except FileNotFoundError as e:
+        raise RuntimeError(f"Command failed: {shlex.join(cmd)}\n{e}") from e
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Command failed: {shlex.join(cmd)}\nSTDOUT: {result.stdout}\nSTDERR: {result.stderr}"
+        )
+    return result.stdout.strip()
+
+def wait_for_ssh(host, port, timeout=30):
+    """Poll host:port until an SSH server answers with its identification banner.
+
+    Docker's port proxy accepts connections before sshd inside the container is
+    listening, so a successful connect alone is not treated as ready.
+
+    Parameters
+    ----------
+    host : str
+        Host to connect to.
+    port : int
+        TCP port to connect to.
+    timeout : int, optional
+        Maximum time to wait in seconds (default is 30).
+
+    Raises
+    ------
+    RuntimeError
+        If no SSH banner is received before the timeout expires.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5) as sock:
+                if sock.recv(4) == b"SSH-":
+                    return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"SSH server on {host}:{port} not ready after {timeout} seconds.")
+
+def wait_for_running(container_id, timeout=30):
+    """Poll a container's state until Docker reports it as running.
+
+    Parameters
+    ----------
+    container_id : str
+        ID of the container to inspect.
+    timeout : int, optional
+        Maximum time to wait in seconds (default is 30).
+
+    Raises
+    ------
+    RuntimeError
+        If the container is not running before the timeout expires.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if run_command(["docker", "inspect", "-f", "{{.State.Running}}", container_id]) == "true":
+            return
+        time.sleep(0.25)
+    raise RuntimeError(f"Container {container_id} not running after {timeout} seconds.")
+
+def get_image_id():
+    """Return the local image ID of DOCKER_IMAGE.
+
+    Raises
+    ------
+    RuntimeError
+        If the image does not exist locally.
+    """
+    return run_command(["docker", "image", "inspect", "-f", "{{.Id}}", DOCKER_IMAGE])